@@ -1,4 +1,4 @@
-from datetime import datetime, timezone
+from datetime import datetime
 from typing import Optional
 
 # 这个文件定义了应用中所有数据模型的基础结构：
@@ -8,12 +8,13 @@ from typing import Optional
 #   - created_at ：记录创建时间
 #   - updated_at ：记录最后更新时间
 #   - 针对PostgreSQL和SQLite提供了不同的实现方式，确保兼容性
-# 1. 引入 Column
-from sqlalchemy import Column, DateTime, func
+from sqlalchemy import DateTime, func
 from sqlmodel import Field, SQLModel
 
 from src.core.config import settings
 
+__all__ = ["Base", "DateTimeMixin"]
+
 # 定义命名约定
 database_naming_convention = {
     "ix": "%(column_0_label)s_idx",
@@ -54,20 +55,25 @@ class DateTimeMixin:
             },
         )
     else:
-        # SQLite: 混合使用 Pydantic 的 default_factory 和 SQLAlchemy 的 Column
-        created_at: datetime = Field(
-            default_factory=lambda: datetime.now(timezone.utc),
-            sa_column=Column(
-                DateTime(timezone=True),
-                nullable=False,
-                index=True
-            ),
+        # SQLite: 同样交给数据库生成时间戳（CURRENT_TIMESTAMP，UTC）
+        # 这样插入 / 更新每一行时都不用再在 Python 里调用 datetime.now()，批量写入时省掉大量函数调用；
+        # 另外用 sa_type + sa_column_kwargs 让每张表各自生成 Column，
+        # 而不是所有表共用 mixin 里同一个 Column 对象（那样第二张表会报 "already assigned to Table"）
+        created_at: Optional[datetime] = Field(
+            default=None,
+            sa_type=DateTime(timezone=True),
+            sa_column_kwargs={
+                "server_default": func.current_timestamp(),
+                "nullable": False
+            },
+            index=True,
         )
-        updated_at: datetime = Field(
-            default_factory=lambda: datetime.now(timezone.utc),
-            sa_column=Column(
-                DateTime(timezone=True),
-                nullable=False,
-                onupdate=lambda: datetime.now(timezone.utc) # SQLite 需要在 SQLAlchemy 层处理更新钩子
-            ),
+        updated_at: Optional[datetime] = Field(
+            default=None,
+            sa_type=DateTime(timezone=True),
+            sa_column_kwargs={
+                "server_default": func.current_timestamp(),
+                "onupdate": func.current_timestamp(),  # UPDATE 语句里直接带上 CURRENT_TIMESTAMP
+                "nullable": False
+            },
         )
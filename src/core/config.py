@@ -1,7 +1,8 @@
 # /src/core/config.py
+from functools import cached_property
 from typing import Literal
 
-from pydantic import Field, computed_field
+from pydantic import Field, computed_field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 # 这个文件是应用的配置中心，使用Pydantic Settings管理：
@@ -11,7 +12,7 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 # - 包含完整的数据库连接参数和连接池配置
 # - 提供Redis连接配置（认证和缓存）
 # - 配置JWT密钥
-# - 使用计算属性动态生成：
+# - 使用计算属性动态生成（cached_property：每个进程只计算一次，之后直接读缓存）：
 #   - 数据库连接URL
 #   - SQLAlchemy引擎选项
 #   - Redis连接URL
@@ -35,13 +36,18 @@ class Settings(BaseSettings):
     db_name: str = "what2eat"
 
     # 连接池配置（仅 PostgreSQL 有效）
-    pool_size: int = Field(ge=1, le=100, default=20, description="连接池大小")
-    max_overflow: int = 10
+    # 默认值按“中高并发”调优：常驻 25 个连接，高峰时最多再借 25 个
+    pool_size: int = Field(ge=1, le=100, default=25, description="连接池大小")
+    max_overflow: int = 25
     pool_timeout: int = 30
     pool_pre_ping: bool = True
-    pool_recycle: int = 3600
-    pool_use_lifo: bool = False
+    # 连接用 5 分钟就回收，避免被数据库 / 中间代理悄悄断掉的“僵尸连接”
+    pool_recycle: int = 300
+    # LIFO：优先复用刚归还的“热”连接，空闲的冷连接可以被 pool_recycle 自然淘汰
+    pool_use_lifo: bool = True
     echo: bool = False
+    # SQLAlchemy 编译后 SQL 的缓存条数（默认 500）。列表查询有多种排序 / 搜索组合，调大一点避免反复编译
+    query_cache_size: int = Field(ge=0, default=1200, description="SQL 编译缓存大小")
 
     # SQLite 配置
     sqlite_db_path: str = "./data/what2eat.sqlite3"
@@ -51,14 +57,19 @@ class Settings(BaseSettings):
     redis_port: int = Field(ge=1, le=65535, default=6379, description="Redis端口")
     auth_redis_db: int = 0
     cache_redis_db: int = 1
+    # 菜品缓存的过期时间（秒），过期后下次读取会重新查数据库
+    dish_cache_ttl: int = Field(ge=1, default=60, description="菜品缓存过期时间（秒）")
+    dish_list_cache_ttl: int = Field(ge=1, default=30, description="菜品列表缓存过期时间（秒）")
+    # 查询单个菜品时是否让缓存和数据库同时查（赛跑），只在 Redis 和数据库延迟接近时才值得打开
+    dish_cache_race: bool = False
 
     @computed_field
-    @property
+    @cached_property
     def database_url(self) -> str:
         """根据数据库类型生成对应的数据库连接URL"""
         if self.db_type == "postgres":
             return (
-                f"postgresql+psycopg://{self.db_user}:{self.db_password}"
+                f"postgresql+asyncpg://{self.db_user}:{self.db_password}"
                 f"@{self.db_host}:{self.db_port}/{self.db_name}"
             )
         elif self.db_type == "sqlite":
@@ -67,7 +78,7 @@ class Settings(BaseSettings):
             raise ValueError(f"Unsupported DB_TYPE: {self.db_type}")
 
     @computed_field
-    @property
+    @cached_property
     def engine_options(self) -> dict:
         """统一封装 engine options，供 create_async_engine 使用（SQLModel 兼容）"""
         if self.db_type == "postgres":
@@ -79,18 +90,19 @@ class Settings(BaseSettings):
                 "pool_use_lifo": self.pool_use_lifo,
                 "echo": self.echo,
                 "pool_pre_ping": self.pool_pre_ping,
+                "query_cache_size": self.query_cache_size,
             }
         # SQLite 不支持连接池参数
-        return {"echo": self.echo}
+        return {"echo": self.echo, "query_cache_size": self.query_cache_size}
 
     @computed_field
-    @property
+    @cached_property
     def auth_redis_url(self) -> str:
         """认证服务的Redis连接URL"""
         return f"redis://{self.redis_host}:{self.redis_port}/{self.auth_redis_db}"
 
     @computed_field
-    @property
+    @cached_property
     def cache_redis_url(self) -> str:
         """缓存服务的Redis连接URL"""
         return f"redis://{self.redis_host}:{self.redis_port}/{self.cache_redis_db}"
@@ -98,6 +110,13 @@ class Settings(BaseSettings):
     # JWT configuration
     jwt_secret: str = Field(..., description="JWT 密钥，必须通过环境变量设置")
 
+    # echo=True 会把每条 SQL 都打到日志里，线上开着既拖慢速度又可能泄露数据，只允许调试时使用
+    @model_validator(mode="after")
+    def check_echo_only_in_debug(self) -> "Settings":
+        if self.echo and not self.debug:
+            raise ValueError("ECHO=True is only allowed when DEBUG=True")
+        return self
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
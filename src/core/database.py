@@ -1,9 +1,14 @@
 # src/core/database.py （建议重命名文件为 database.py）
+import asyncio
 from typing import AsyncGenerator
 
 from loguru import logger
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.core.config import settings
 
@@ -13,6 +18,7 @@ from src.core.config import settings
 # - 配置异步会话工厂，设置会话行为参数
 # - 提供FastAPI依赖注入用的数据库会话生成器 get_db()
 # - 包含数据库表初始化函数 create_db_and_tables()
+# - 包含生产环境启动时用的连通性检查 check_db_connection()
 # 这四个文件共同构成了应用的核心基础设施，提供了配置管理、数据模型基类、数据库连接和会话管理等关键功能，为整个应用提供了坚实的技术基础。
 
 
@@ -20,13 +26,18 @@ from src.core.config import settings
 
 
 # 创建异步引擎
-engine = create_async_engine(settings.database_url, **settings.engine_options)
+engine_options = settings.engine_options
+if settings.db_type == "postgres":
+    # 显式指定异步队列连接池，pool_size / max_overflow / pool_use_lifo 等参数都作用在它上面
+    # 每个请求的 Session 只是从池子里“借”一个连接，用完归还，并不会新建 TCP 连接
+    engine_options = {**engine_options, "poolclass": AsyncAdaptedQueuePool}
+engine = create_async_engine(settings.database_url, **engine_options)
 #异步引擎是是所有异步数据库操作（如会话、连接、事务）的基础。
 
 # 创建异步会话工厂 创建会话（Session）的作用是：
 # 提供一个与数据库交互的“工作区”或“对话上下文”，用于执行查询、增删改操作、管理事务和对象状态。
 SessionFactory = async_sessionmaker(
-    class_=AsyncSession,#异步会话
+    class_=AsyncSession,#异步会话（SQLModel 版本，Repository 里用到的 session.exec() 是它提供的）
     autoflush=False,#控制是否在每次查询前自动将待处理的变更同步（flush）到数据库
     expire_on_commit=False,#提交后，对象保持“新鲜”,别把对象清空。
     bind=engine,
@@ -47,6 +58,32 @@ async def create_db_and_tables():
     from src.dishes.model import Dish, Collection
     print(f"🕵️‍♂️ 侦探报告：当前正在连接的数据库是: {settings.database_url}")
     async with engine.begin() as conn:
+        # 先查一次数据库里已有哪些表：表都在的话就跳过 create_all，
+        # 省掉它对每个模型逐个检查 / 建表的那一串目录查询，启动更快
+        existing_tables = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+        if set(SQLModel.metadata.tables) <= set(existing_tables):
+            logger.info("数据库表已存在，跳过建表。")
+            return
+        if settings.db_type == "postgres":
+            # 菜品名称 / 描述上的三元组 GIN 索引依赖 pg_trgm 扩展，必须在建表（建索引）之前装好
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         # 使用 SQLModel 的 metadata 创建所有表
         await conn.run_sync(SQLModel.metadata.create_all)
     logger.info("数据库表创建成功。")
+
+
+# 生产环境启动时只确认“数据库连得上”，不做任何建表 / 反射表结构的操作
+# 表结构的变更交给部署流程里单独跑的迁移任务，应用启动不再承担这部分耗时
+# 数据库可能比应用晚几秒就绪（比如容器一起拉起），所以失败了隔一会儿再试
+async def check_db_connection(retries: int = 5, delay: float = 1.0) -> None:
+    for attempt in range(1, retries + 1):
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            logger.info("数据库连接正常。")
+            return
+        except (OperationalError, OSError) as e:
+            if attempt == retries:
+                raise
+            logger.warning(f"数据库连接失败（第 {attempt}/{retries} 次），{delay} 秒后重试：{e}")
+            await asyncio.sleep(delay)
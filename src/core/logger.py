@@ -0,0 +1,26 @@
+# src/core/logger.py
+import sys
+
+from loguru import logger
+
+from src.core.config import settings
+
+# 这个文件统一配置 loguru 的输出：
+# - enqueue=True：logger.info(...) 只是把日志放进队列，由后台线程负责写 stderr，
+#   写日志不会占用事件循环，请求处理不用等 I/O
+# - 生产环境输出 JSON（serialize=True），一行一条，方便日志系统收集、检索
+# - diagnose 会在报错时把每一层调用栈的局部变量都打印出来，能帮忙排查，但又慢又可能泄露数据，
+#   所以只在 DEBUG 时开启
+
+
+def setup_logging() -> None:
+    # 先去掉 loguru 默认的同步 stderr 输出，否则每条日志会打印两遍
+    logger.remove()
+    logger.add(
+        sys.stderr,
+        level="DEBUG" if settings.debug else "INFO",
+        enqueue=True,
+        backtrace=False,
+        diagnose=settings.debug,
+        serialize=not settings.debug,
+    )
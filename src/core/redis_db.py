@@ -2,32 +2,58 @@
 from typing import cast
 
 from fastapi import Request
-from redis.asyncio import Redis
+from redis.asyncio import BlockingConnectionPool, Redis
 
 from src.core.config import settings
 
+# 连接池：每个 Redis 库只建一个，整个进程共享
+# 🟢 如果每次调用 create_*_redis 都用 from_url，每次都会新建一个连接池，调用多了连接数就会成倍增长；
+# 所以连接池在模块导入时创建一次，下面的工厂函数只是在同一个池子上包一层 Redis 客户端
+# BlockingConnectionPool：连接用完时排队等待（最多 timeout 秒），而不是直接抛 ConnectionError，
+# 突发流量下更平稳，等待的请求也是先来先得
+# health_check_interval：连接闲置超过 30 秒，下次用之前先 PING 一下，
+# 被服务端 / 防火墙悄悄断掉的连接会在这里被发现并重连，而不是让真实请求卡在坏连接上
+_auth_pool = BlockingConnectionPool.from_url(
+    settings.auth_redis_url,
+    max_connections=50,
+    timeout=5,
+    health_check_interval=30,
+    decode_responses=True,
+)
+# 🟡 缓存里放的基本都是 JSON，Pydantic 可以直接解析 bytes，
+# 所以缓存池不让 redis-py 先把每个响应解码成 str，省掉一次 UTF-8 解码
+_cache_pool = BlockingConnectionPool.from_url(
+    settings.cache_redis_url,
+    max_connections=50,
+    timeout=5,
+    health_check_interval=30,
+    decode_responses=False,
+)
+
 
 # 创建认证 Redis 连接
 # 认证 Redis 连接用于存储用户认证信息，例如会话 ID、访问令牌等
 def create_auth_redis() -> Redis:
-    return Redis.from_url(
-        settings.auth_redis_url,
-        max_connections=20,
-        decode_responses=True,
-    )
+    return Redis(connection_pool=_auth_pool)
 
 
 # 创建缓存 Redis 连接
 # 缓存 Redis 连接用于存储临时数据，例如用户会话、缓存结果等
 def create_cache_redis() -> Redis:
-    return Redis.from_url(
-        settings.cache_redis_url,
-        max_connections=20,
-        decode_responses=True,
-    )
+    return Redis(connection_pool=_cache_pool)
+
+
+# 关闭连接池
+# 客户端是用外部传入的连接池创建的，client.aclose() 不会关掉池子里的连接，
+# 所以应用关闭时需要单独断开
+async def close_redis_pools() -> None:
+    await _auth_pool.disconnect()
+    await _cache_pool.disconnect()
 
 # 获取认证 Redis 连接
 # 从请求状态中获取认证 Redis 连接
+# 🟢 这里不会新建任何东西：客户端只在 lifespan 启动时创建一次，
+# lifespan yield 出来的 State 会被放进每个请求的 request.state，里面存的只是同一个客户端的引用
 async def get_auth_redis(request: Request) -> Redis:
     return cast(Redis, request.state.auth_redis)
 
@@ -0,0 +1,106 @@
+# src/dishes/cache.py
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from src.core.config import settings
+
+# 这个文件是菜品的缓存层 (Cache-Aside 旁路缓存)：
+# - 读：先查 Redis，命中直接返回；没命中再查数据库，然后把结果写回 Redis
+# - 写：创建 / 更新 / 删除菜品后，把相关的缓存删掉，下次读的时候自然会重新加载
+# - 缓存里存的是 DishPublic 序列化后的 JSON，而不是数据库对象
+
+# 缓存的 Redis 连接不做解码 (decode_responses=False)，读写的都是 JSON bytes，
+# 存进去的就是接口的响应体，命中时原样返回，不用再解析 / 序列化
+
+# 所有列表缓存 key 的前缀
+DISH_LIST_KEY_PREFIX = "dishes:list:"
+# 记录“当前有哪些列表缓存 key”的 Redis SET，失效时按它来删，不用扫描整个 Redis
+DISH_LIST_TAGS_KEY = "dishes:list:tags"
+# 记录“用过的菜名”的 Redis SET，创建菜品前用来快速判断名字是否可能重复
+# 只增不减：删除 / 改名后旧名字还留在集合里，会多一次数据库确认，但不会误判
+DISH_NAMES_KEY = "dishes:names"
+
+
+class DishCache:
+    """
+    菜品缓存 (Cache Layer)
+    职责：
+    1. 统一生成缓存 key
+    2. 读写单个菜品 / 菜品列表的缓存
+    3. 数据变更后让缓存失效
+    """
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    # 单个菜品的 key，例如 dish:123
+    @staticmethod
+    def dish_key(dish_id: int) -> str:
+        return f"dish:{dish_id}"
+
+    # 列表的 key 由查询参数拼出来，参数一样 key 就一样
+    # 🟡 注意：不能用 Python 的 hash()，它在每个进程里的结果都不一样
+    # search 是用户随便输入的，可能带冒号，所以放在最后，保证不同参数拼出来的 key 不会撞车
+    @staticmethod
+    def list_key(
+            *,
+            search: Optional[str],
+            order_by: str,
+            direction: str,
+            limit: int,
+            offset: int,
+            cursor: Optional[int] = None,
+    ) -> str:
+        return (
+            f"{DISH_LIST_KEY_PREFIX}{order_by}:{direction}:{limit}:{offset}:"
+            f"{cursor or ''}:{search or ''}"
+        )
+
+    # 单个菜品直接以 JSON bytes 的形式读写：
+    # 命中时接口把这段 bytes 原样返回给前端，既不用解析成 DishPublic，也不用再序列化一遍
+    async def get_dish_json(self, dish_id: int) -> Optional[bytes]:
+        return await self.redis.get(self.dish_key(dish_id))
+
+    async def set_dish_json(self, dish_id: int, body: bytes) -> None:
+        # ex=过期时间（秒），相当于 SETEX
+        await self.redis.set(self.dish_key(dish_id), body, ex=settings.dish_cache_ttl)
+
+    # 列表同样以 JSON bytes 的形式读写，命中时接口原样返回
+    async def get_list_json(self, key: str) -> Optional[bytes]:
+        return await self.redis.get(key)
+
+    async def set_list_json(self, key: str, body: bytes) -> None:
+        # 列表受新增 / 修改影响的面更大，过期时间比单个菜品短一些
+        ttl = settings.dish_list_cache_ttl
+        pipe = self.redis.pipeline()
+        pipe.set(key, body, ex=ttl)
+        # 顺手把这个 key 登记到标签集合里
+        pipe.sadd(DISH_LIST_TAGS_KEY, key)
+        # 标签集合跟着续期：最后一次写入 ttl 秒后，里面登记的列表缓存也都过期了，集合不会无限变大
+        pipe.expire(DISH_LIST_TAGS_KEY, ttl)
+        await pipe.execute()
+
+    # 菜名是否“可能”已经存在：True 需要再去数据库确认，False 说明大概率是新名字
+    async def has_name(self, name: str) -> bool:
+        return bool(await self.redis.sismember(DISH_NAMES_KEY, name))
+
+    async def add_name(self, name: str) -> None:
+        await self.redis.sadd(DISH_NAMES_KEY, name)
+
+    # 让缓存失效
+    # dish_id 为 None 时（比如新建菜品）只需要清列表缓存，
+    # 因为新菜品之前根本不可能被单独缓存过
+    async def invalidate(self, dish_id: Optional[int] = None) -> None:
+        # SMEMBERS 只读标签集合本身，复杂度和列表缓存的数量有关，和整个 Redis 有多少 key 无关
+        list_keys = await self.redis.smembers(DISH_LIST_TAGS_KEY)
+
+        # 用 pipeline 把多条删除命令一次性发给 Redis，只走一次网络往返
+        # UNLINK 和 DEL 效果一样，但内存回收是在 Redis 后台线程做的，不阻塞
+        # 🟡 SMEMBERS 和 UNLINK 之间如果刚好有新的列表写进来，它会随标签集合一起被删掉登记，
+        # 最多多活一个 TTL，对列表缓存来说可以接受
+        pipe = self.redis.pipeline()
+        if dish_id is not None:
+            pipe.unlink(self.dish_key(dish_id))
+        pipe.unlink(*list_keys, DISH_LIST_TAGS_KEY)
+        await pipe.execute()
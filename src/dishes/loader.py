@@ -0,0 +1,75 @@
+# src/dishes/loader.py
+import asyncio
+from typing import Dict, Optional, Set, cast
+
+from fastapi import Request
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.dishes.model import Dish
+from src.dishes.repository import DishRepository
+
+# 这个文件实现了一个简易的 DataLoader（批量加载器）：
+# - 高并发时，很多请求会在同一时刻查询不同（或相同）的菜品 ID
+# - 如果每个请求各查各的，就是 N 次数据库往返
+# - DataLoader 把“同一轮事件循环”里收到的所有 ID 攒在一起，
+#   下一轮只发一条 SELECT ... WHERE id IN (...)，再把结果分发给每个等待者
+# 整个进程只需要一个 DishLoader（在 lifespan 里创建），它用自己的 Session 查询，
+# 因为每个请求的 Session 不能被多个请求同时使用
+# 🟡 为什么不是“每个请求一个 DataLoader”：一个 GET /{dish_id} 请求只查一个 ID，
+# 请求级别的 loader 里永远只有一个 ID，攒不成批；只有跨请求共用，并发请求的 ID 才能合并成一条查询
+# 结果按 ID 分发给各自的 Future，所以每个调用者拿到的一定是自己要的那道菜，和 SELECT 返回的行顺序无关
+
+
+class DishLoader:
+    """
+    菜品批量加载器
+    用法：dish = await loader.load(dish_id)，找不到返回 None
+    """
+
+    def __init__(self, session_factory: async_sessionmaker):
+        self.session_factory = session_factory
+        # 本轮等待加载的 ID -> 对应的 Future（同一个 ID 多次请求共用一个 Future）
+        self._pending: Dict[int, asyncio.Future[Optional[Dish]]] = {}
+        # 正在执行的批量查询任务，保留引用防止被垃圾回收
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, dish_id: int) -> Optional[Dish]:
+        future = self._pending.get(dish_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            # 本轮第一个 ID：安排在下一轮事件循环统一发查询，
+            # 在这之前进来的其他 load() 调用都会加进同一批
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            future = loop.create_future()
+            self._pending[dish_id] = future
+        # shield：某个请求被取消时，不要连带把别的请求也在等的 Future 取消掉
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        batch, self._pending = self._pending, {}
+        task = asyncio.create_task(self._load_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(self, batch: Dict[int, asyncio.Future[Optional[Dish]]]) -> None:
+        try:
+            async with self.session_factory() as session:
+                dishes = await DishRepository(session).get_by_ids(list(batch))
+        except Exception as e:
+            # 查询失败时，这一批的每个等待者都拿到同一个异常，交给全局异常处理
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        found = {dish.id: dish for dish in dishes}
+        for dish_id, future in batch.items():
+            if not future.done():
+                future.set_result(found.get(dish_id))
+
+
+# 获取菜品批量加载器
+# 从请求状态中获取（由 lifespan 在启动时创建，整个进程共用一个）
+async def get_dish_loader(request: Request) -> DishLoader:
+    return cast(DishLoader, request.state.dish_loader)
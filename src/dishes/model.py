@@ -1,9 +1,11 @@
 from typing import TYPE_CHECKING, List, Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel, Text
 
 # 假设你已经定义好了 DateTimeMixin
 from src.core.base_model import DateTimeMixin,Base
+from src.core.config import settings
 
 
 
@@ -33,6 +35,25 @@ class CollectionDishLink(SQLModel, table=True):
 class Dish(SQLModel, DateTimeMixin, table=True):
     __tablename__ = "dishes"
 
+    # 列表搜索用的是 ILIKE '%关键词%'，前面带 % 的模糊匹配普通 B-Tree 索引用不上，只能全表扫描。
+    # Postgres 的 pg_trgm 三元组 GIN 索引可以支持这种查询（需要 pg_trgm 扩展，create_db_and_tables 里会创建）。
+    # SQLite 没有对应的索引类型，只能全表扫描，所以只在 Postgres 下加
+    if settings.db_type == "postgres":
+        __table_args__ = (
+            Index(
+                "dishes_name_trgm_idx",
+                "name",
+                postgresql_using="gin",
+                postgresql_ops={"name": "gin_trgm_ops"},
+            ),
+            Index(
+                "dishes_description_trgm_idx",
+                "description",
+                postgresql_using="gin",
+                postgresql_ops={"description": "gin_trgm_ops"},
+            ),
+        )
+
     # id: 在 Python 侧创建对象时是 None (因为还没存库)，数据库自动生成 ID
     id: Optional[int] = Field(default=None, primary_key=True) #ptional 要么是指定类型要么不填
 
@@ -46,9 +67,14 @@ class Dish(SQLModel, DateTimeMixin, table=True):
     # 这里的 Relationship 是 SQLModel 提供的，用于定义多对多关系
     # back_populates="dishes" 表示在 Collection 模型中也有一个 dishes 属性，用于反向引用
     # link_model=CollectionDishLink 表示使用 CollectionDishLink 作为中间表
+    # 🟡 这一侧故意不设 selectin：多对多两边都 selectin 会互相触发，查一页菜品就把整张关系图都拉出来。
+    # DishPublic 目前不返回 collections，需要时在查询里加 .options(selectinload(Dish.collections)) 即可
+    # lazy="raise"：忘了加 selectinload 就去访问 dish.collections 时直接报错，
+    # 而不是悄悄给每个菜品单独发一条查询（N+1），以后列表接口要返回收藏夹时一眼就能发现
     collections: List["Collection"] = Relationship(
         back_populates="dishes", #建立双向联系
-        link_model=CollectionDishLink  # <--- 这里必须传入中间表类，指定去哪查找
+        link_model=CollectionDishLink,  # <--- 这里必须传入中间表类，指定去哪查找
+        sa_relationship_kwargs={"lazy": "raise"},
     )
 class Collection(Base, DateTimeMixin, table=True):
     __tablename__ = "collections"
@@ -57,7 +83,10 @@ class Collection(Base, DateTimeMixin, table=True):
     name: str = Field(max_length=255, nullable=False)
 
     # 🟢【修正 2】link_model 必须传类 (CollectionDishLink)，不能传字符串
+    # lazy="selectin"：查出一批收藏夹后，用一条 WHERE collection_id IN (...) 把它们的菜品一次性查出来，
+    # 而不是每个收藏夹单独查一次（N+1 问题）；异步 Session 下也不会因为懒加载报 MissingGreenlet
     dishes: List["Dish"] = Relationship(
         back_populates="collections",
-        link_model=CollectionDishLink  # <--- 去掉引号！
+        link_model=CollectionDishLink,  # <--- 去掉引号！
+        sa_relationship_kwargs={"lazy": "selectin"},
     )
\ No newline at end of file
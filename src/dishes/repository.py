@@ -1,12 +1,52 @@
-from typing import List, Optional
+import operator
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
-from src.dishes.schema import DishCreate, DishUpdate
+from src.dishes.schema import DishCreate
+from sqlalchemy import bindparam, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import IntegrityError
 from sqlmodel import asc, col, desc, select
+from sqlmodel.sql.expression import SelectOfScalar
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.core.config import settings
 from src.dishes.model import Dish
 
+# PostgreSQL 和 SQLite 都支持 INSERT ... ON CONFLICT DO NOTHING，
+# 但 SQLAlchemy 把它放在各自方言的 insert() 上，按当前数据库类型选一个
+_insert = postgresql.insert if settings.db_type == "postgres" else sqlite.insert
+
+
+# 列表查询允许的排序字段只有 3 个、方向只有 2 个，一共 6 种组合，
+# 所以在模块导入时把“SELECT + ORDER BY”这部分提前拼好，每个请求直接拿来用，
+# 不用每次都 getattr 取字段对象、再重新构造排序子句
+# SQLModel 的 select 写法更像 Python 类型注解：
+# select(Dish) 就好比 SQL 语句 SELECT * FROM dishes，还没查询，后续再追加筛选和分页
+# 语句对象是不可变的，.where() / .limit() 都会返回新对象，共用这些“模板”是安全的
+_SORT_FIELDS = ("id", "name", "created_at")
+_LIST_STATEMENTS: Dict[Tuple[str, str], SelectOfScalar[Dish]] = {
+    (field, direction): select(Dish).order_by(order(getattr(Dish, field)))
+    for field in _SORT_FIELDS
+    for direction, order in (("asc", asc), ("desc", desc))
+}
+
+
+# 按 ID / 菜名查询、按 ID 更新的语句，结构每次都一样，只有参数不同，
+# 所以也在模块导入时用 bindparam 占位建好，执行时通过 params 传值：
+# 省掉每个请求重新构造语句对象的开销，SQLAlchemy 的编译缓存也总是命中同一份
+_GET_BY_ID = select(Dish).where(col(Dish.id) == bindparam("dish_id"))
+# expanding=True：执行时按传入列表的长度展开成 IN (?, ?, ...)
+_GET_BY_IDS = select(Dish).where(col(Dish.id).in_(bindparam("dish_ids", expanding=True)))
+_EXISTS_BY_NAME = select(Dish.id).where(col(Dish.name) == bindparam("name")).limit(1)
+# 🟡 synchronize_session="fetch"：WHERE 里是 bindparam，ORM 默认的 "evaluate" 策略拿不到具体的 id，
+# 没法在 Python 里判断身份映射中哪些 Dish 被改了，结果同一个 Session 里已经加载过的对象不会更新，
+# RETURNING 交回来的也是那个旧对象。"fetch" 按数据库实际改到的行（RETURNING 的主键）同步，不影响往返次数
+_UPDATE_BY_ID = (
+    update(Dish)
+    .where(col(Dish.id) == bindparam("dish_id"))
+    .execution_options(synchronize_session="fetch")
+)
+
 
 class DishRepository:
     """
@@ -17,38 +57,27 @@ class DishRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    # 🟢 dish_in 只是用户传来的 JSON 数据（比如 {"name": "炒蛋"}）。
-    #这就好比一张“进货单”。这行代码的作用是根据进货单，生成一个真实的数据库对象 Dish（包含 ID 占位符、表结构等）。
-    # 这时候数据库还没有真正存储这个对象，只是在内存里等待确认。
-    # 只有当你调用 commit 时，数据库才会真正存储这个对象。
-    async def create(self, dish_in: DishCreate) -> Dish:
-        # 使用 SQLModel 的 model_validate 将 Schema 转为 DB Model
-        #把“进货单”变成“实物”
-        # 这行代码的作用是根据进货单，生成一个真实的数据库对象 Dish（包含 ID 占位符、表结构等）。
-        #model_validate 是 SQLModel 提供的方法，作用是把 Schema 转换为 DB Model。
-        # 这行代码的作用是根据用户传入的 JSON 数据（dish_in），生成一个 Dish 数据库对象（dish）。
-        # 这个过程叫做“模型验证”（model validation）。
-        # 模型验证的作用是确保用户传入的数据符合数据库表的定义。
-        # 比如如果用户传入的 JSON 数据里没有 name 字段，或者 name 字段不是字符串，
-        # 就会触发验证错误，阻止数据入库。
-        #model_validate
-        dish = Dish.model_validate(dish_in)
-        #把货放到传送带上（还没入库）
-        #此时 dish 还在 Python 的内存里。这句话是告诉数据库：“嘿，我准备存个东西，你准备一下。”（此时还没真正写入硬盘）。
-        self.session.add(dish)
-        try:
-            #按下确认键，正式入库
-            await self.session.commit()
-        except IntegrityError:
-            #如果报警了（比如名字重复），赶紧撤销，别卡死
-            #rollback 就是撤销之前的操作，就像你在草稿纸上写了点东西，结果发现不对，就擦掉重写。
-            await self.session.rollback()
-            raise
-        #重新看一眼入库后的货（为了拿到自动生成的 ID 和 创建时间）
-        #commit 之后，数据库生成了 ID 和时间，但 Python 内存里的这个对象还不知道。
-        # refresh 就是让 Python 跑去数据库问：“刚才存的那条数据，ID 是多少？时间是多少？快同步给我。”
-        # 然后 Python 内存里的对象就会更新。
-        await self.session.refresh(dish)
+    # 🟢 dish_in 只是用户传来的 JSON 数据（比如 {"name": "炒蛋"}），就好比一张“进货单”。
+    # 下面的 INSERT 语句按进货单直接在数据库里插入一行，并把入库后的整行作为 Dish 对象带回来；
+    # 在调用 commit 之前，这次插入还只是事务里的改动，其他连接看不到。
+    async def create(self, dish_in: DishCreate) -> Optional[Dish]:
+        # INSERT ... RETURNING：插入的同时让数据库把整行（自动生成的 ID、创建时间）一起返回来
+        # 以前是 add → commit → refresh，refresh 还要再发一条 SELECT 去“重新看一眼入库后的货”，
+        # 现在一条语句就拿到了完整的 Dish 对象，少一次数据库往返
+        # 字段校验已经在 DishCreate 里做过了，这里直接把“进货单”的内容塞进 INSERT
+        # ON CONFLICT (name) DO NOTHING：名字重复时数据库不报错，只是什么都不插入，RETURNING 也就是空的
+        # 这样重名不会走“抛 IntegrityError -> 回滚 -> 捕获”这一整套异常流程，返回 None 交给 Service 判断
+        statement = (
+            _insert(Dish)
+            .values(**dish_in.model_dump())
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(Dish)
+        )
+        result = await self.session.exec(statement)
+        dish = result.scalar_one_or_none()
+        #按下确认键，正式入库
+        await self.session.commit()
+        # 🟢 会话是 expire_on_commit=False，commit 之后 dish 上的字段依然可以直接读
         return dish
     # 🔍 查询单个菜品（根据 ID）
     # 这行代码的作用是查询数据库中 ID 为 dish_id 的记录。
@@ -65,26 +94,44 @@ class DishRepository:
         # dish = await dish_repo.get_by_id(123)
         # 如果数据库中 ID 为 123 的记录存在，dish 就会是一个 Dish 对象；如果不存在，dish 就会是 None。
 
-        return await self.session.get(Dish, dish_id)
+        # 每个请求的 Session 都是新的，session.get 的“先查内存里的身份映射”基本用不上，
+        # 直接执行预先建好的语句
+        result = await self.session.exec(_GET_BY_ID, params={"dish_id": dish_id})
+        return result.first()
+
+    # 🔍 判断菜名是否已被占用：只查 id 并且 LIMIT 1，不加载整行数据
+    async def exists_by_name(self, name: str) -> bool:
+        result = await self.session.exec(_EXISTS_BY_NAME, params={"name": name})
+        return result.first() is not None
+
+    # 🔍 批量查询菜品（根据一组 ID），一条 SELECT ... WHERE id IN (...) 查完
+    # 返回的列表顺序不保证和 dish_ids 一致，找不到的 ID 直接不出现在结果里
+    async def get_by_ids(self, dish_ids: Sequence[int]) -> List[Dish]:
+        result = await self.session.exec(_GET_BY_IDS, params={"dish_ids": list(dish_ids)})
+        return list(result.all())
 
     # 🟡 变化 2: 查询逻辑微调 (select 来自 sqlmodel)
-    async def get_all(
-            self,
+    # 列表查询语句的拼装单独抽出来，get_all（一次查完）和 iter_all（流式逐行读取）共用
+    @staticmethod
+    def _build_list_statement(
             *,
-            search: Optional[str] = None,
-            order_by: str = "id",
-            direction: str = "asc",
-            limit: int = 10,
-            offset: int = 0,
-    ) -> List[Dish]:
-
-        # SQLModel 的 select 写法更像 Python 类型注解
-        # 这行代码的作用是查询数据库中所有的 Dish 记录。
-        # 它就好比你在数据库里写了 SQL 语句：SELECT * FROM dishes，还没查询，后续要写筛选语句
-        # 但是因为使用了 SQLModel，所以你可以直接写 Python 代码，而不需要写 SQL 语句。
-        statement = select(Dish)
+            search: Optional[str],
+            order_by: str,
+            direction: str,
+            limit: int,
+            offset: int,
+            cursor: Optional[int],
+    ) -> SelectOfScalar[Dish]:
+        # 1. 排序
+        # 安全检查：防止 SQL 注入或报错，只允许特定字段排序
+        # 不合法的字段按 id 排，不合法的方向按升序排，和字典里的默认组合一致
+        if order_by not in _SORT_FIELDS:
+            order_by = "id"
+        if direction != "desc":
+            direction = "asc"
+        statement = _LIST_STATEMENTS[(order_by, direction)]
 
-        # 1. 搜索
+        # 2. 搜索
         if search:
             # col() 帮助编辑器识别字段，ilike 是不区分大小写的模糊匹配
             # 这行代码的作用是查询数据库中 name 或 description 包含 search 字符串的记录。
@@ -94,31 +141,37 @@ class DishRepository:
                 col(Dish.description).ilike(f"%{search}%")
             )
 
-        # 2. 排序
-        # 安全检查：防止 SQL 注入或报错，只允许特定字段排序
-        valid_sort_fields = {"id", "name", "created_at"}
-        if order_by not in valid_sort_fields:
-            order_by = "id"
-
-        # getattr 动态获取字段对象 (Dish.id, Dish.name ...)
-        # 这行代码的作用是根据 order_by 字符串，动态获取 Dish 类里对应的字段对象。
-        # 比如如果 order_by 是 "name"，就会获取 Dish.name 这个字段对象。
-        #getattr 就是 Python 的魔法函数，它可以把字符串变成属性对象
-        sort_column = getattr(Dish, order_by)
-
-        if direction == "desc":
-            # 这行代码的作用是根据 sort_column 字段，对查询结果进行降序排序。
-            # 比如如果 sort_column 是 Dish.name，就会按名称倒序排序。
-            # 为什么要用字段对象排序，而不是直接用字符串？
-            # 因为字段对象可以直接被 SQLAlchemy 识别和处理，而字符串则需要手动转义，增加了风险。
-            statement = statement.order_by(desc(sort_column))
-        else:
-            # 这行代码的作用是根据 sort_column 字段，对查询结果进行升序排序。
-            # 比如如果 sort_column 是 Dish.name，就会按名称升序排序。
-            statement = statement.order_by(asc(sort_column))
-
         # 3. 分页
-        statement = statement.offset(offset).limit(limit)
+        # 传了 cursor（上一页最后一条的 id）就走游标分页，offset 不再生效：
+        # WHERE id > cursor（倒序是 id < cursor）直接从上一页的末尾接着找，
+        # 数据库不用先扫描再丢掉前 offset 行，翻到多深都一样快
+        # 🟡 游标只是一个 id，所以只能配合按 id 排序使用：按其他字段排序时还得再查一次游标那一行的值，
+        # 那一行被删掉或改了名，翻页就会断掉或者漏数据（Router 层对这种组合直接返回 422）
+        if cursor is not None:
+            if order_by != "id":
+                raise ValueError("cursor pagination requires order_by='id'")
+            after = operator.lt if direction == "desc" else operator.gt
+            return statement.where(after(col(Dish.id), cursor)).limit(limit)
+        return statement.offset(offset).limit(limit)
+
+    async def get_all(
+            self,
+            *,
+            search: Optional[str] = None,
+            order_by: str = "id",
+            direction: str = "asc",
+            limit: int = 10,
+            offset: int = 0,
+            cursor: Optional[int] = None,
+    ) -> List[Dish]:
+        statement = self._build_list_statement(
+            search=search,
+            order_by=order_by,
+            direction=direction,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+        )
 
         # 执行查询
         result = await self.session.exec(statement)
@@ -127,38 +180,49 @@ class DishRepository:
         # 这行代码的作用是把结果集转换为一个列表，方便后续处理。
         return list(result.all())
 
+    # 流式查询：和 get_all 条件完全一样，但不会一次性把所有行读进一个 list
+    # session.stream_scalars 用的是服务端游标，数据库那边边查边发，Python 这边拿到一行处理一行
+    async def iter_all(
+            self,
+            *,
+            search: Optional[str] = None,
+            order_by: str = "id",
+            direction: str = "asc",
+            limit: int = 10,
+            offset: int = 0,
+            cursor: Optional[int] = None,
+    ) -> AsyncIterator[Dish]:
+        statement = self._build_list_statement(
+            search=search,
+            order_by=order_by,
+            direction=direction,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+        )
+        result = await self.session.stream_scalars(statement)
+        async for dish in result:
+            yield dish
+
     # 这行代码的作用是更新数据库中 ID 为 dish_id 的记录。
     # 如果找到，就返回一个 Dish 对象；如果没有找到，就返回 None。
-    async def update(self, dish_id: int, dish_in: DishUpdate) -> Optional[Dish]:
-        # 先查旧数据
-        dish = await self.session.get(Dish, dish_id)
-        if not dish:
-            return None
-
-        # 核心魔法：exclude_unset=True
-        # 如果 dish_in 里没有传 name，就不更新 name，只更新传了的字段
-        # 这行代码的作用是把 dish_in 这个 Pydantic 模型对象，转换为一个字典。
-        # 字典的键是字段名，值是字段值。
-        # 这个操作的作用是把用户传入的更新数据，变成一个可以直接用来更新数据库的字典。
-        update_data = dish_in.model_dump(exclude_unset=True)
-
-        # 自动把字典数据“涂抹”到对象上
-        dish.sqlmodel_update(update_data)
-        # 这行代码的作用是把 update_data 这个字典，“涂抹”到 dish 这个对象上。
-        # 字典的键是字段名，值是字段值。
-        # 这个操作的作用是把用户传入的更新数据，更新到 dish 对象上。
-        # 比如如果 update_data 是 {"name": "新名称"}，就会把 dish.name 更新为 "新名称"。
-        # 为什么后面两步要用异步？
-        # 因为数据库操作是异步的，为了避免阻塞事件循环，我们需要用异步操作。
-        # 这行代码的作用是把 dish 对象添加到数据库会话中。
-        # 这行代码的作用是提交数据库会话，把所有变更保存到数据库。
-        # 这行代码的作用是刷新数据库会话，确保 dish 对象是最新的。
-        # 为什么 add 不是异步的？
-        # 因为 add 操作只是把对象添加到会话中，并没有立即执行数据库操作。
-        # 只有 commit 操作才会触发数据库操作，所以 add 不需要异步。
-        self.session.add(dish)
-        await self.session.commit()
-        await self.session.refresh(dish)
+    # patch 是 Service 层已经 dump 好的字典，只包含用户真正传了的字段
+    async def update(self, dish_id: int, patch: Dict[str, Any]) -> Optional[Dish]:
+        if not patch:
+            # 什么都没传，UPDATE 没有可以 SET 的列，直接查出来返回就行
+            return await self.get_by_id(dish_id)
+
+        # UPDATE ... RETURNING：不用先 SELECT 旧数据、改完再 refresh，
+        # 一条语句完成“改 + 取回最新的一整行”；找不到这条记录时 RETURNING 返回空，结果就是 None
+        # 只有 SET 的列随 patch 变化，UPDATE ... WHERE id = :dish_id 这部分复用预先建好的语句
+        statement = _UPDATE_BY_ID.values(**patch).returning(Dish)
+        try:
+            result = await self.session.exec(statement, params={"dish_id": dish_id})
+            dish = result.scalar_one_or_none()
+            await self.session.commit()
+        except IntegrityError:
+            await self.session.rollback()
+            raise
         return dish
 
     async def delete(self, dish_id: int) -> bool:
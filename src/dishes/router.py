@@ -1,10 +1,20 @@
-from typing import Annotated, List
+import hashlib
+from email.message import Message
+from typing import Annotated, Any, AsyncIterator, Awaitable, Callable, Dict, List, Type, TypeVar
 
-from fastapi import APIRouter, Depends, Path, status
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, Path, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from redis.asyncio import Redis
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 # 🟢 导入我们在 database.py 定义的获取 session 的函数
 from src.core.database import get_db
+from src.core.redis_db import get_cache_redis
+from src.dishes.cache import DishCache
+from src.dishes.dto import dish_dto_adapter
+from src.dishes.loader import DishLoader, get_dish_loader
 from src.dishes.repository import DishRepository
 
 # 🟢 导入 Schema (注意文件名是 schemas 不是 schema)
@@ -24,22 +34,129 @@ router = APIRouter(tags=["Dishes"])
 
 # =====================================================================
 # 🟢 依赖注入核心 (The Glue)
-# 作用：自动组装 Session -> Repository -> Service
+# 作用：自动组装 Session + Redis + Loader -> Repository + Cache -> Service
 # =====================================================================
-async def get_dish_service(session: AsyncSession = Depends(get_db)) -> DishService:
+async def get_dish_service(
+    session: AsyncSession = Depends(get_db),
+    cache_redis: Redis = Depends(get_cache_redis),
+    loader: DishLoader = Depends(get_dish_loader),
+) -> DishService:
     """
     依赖注入工厂函数：
-    1. FastAPI 自动注入数据库 Session
-    2. 创建 Repository 实例
+    1. FastAPI 自动注入数据库 Session、缓存 Redis 连接和菜品批量加载器
+    2. 创建 Repository 和 Cache 实例
     3. 创建 Service 实例并返回
     """
     repository = DishRepository(session)
-    return DishService(repository)
+    cache = DishCache(cache_redis)
+    return DishService(repository, cache, loader)
 
 # 定义一个类型别名，方便后面写参数类型，让代码更短
 DishServiceDep = Annotated[DishService, Depends(get_dish_service)]
 
 
+# 把已经序列化好的 JSON bytes 包成响应直接返回
+# 默认情况下 FastAPI 会先用 response_model 校验返回值，再 jsonable_encoder 转成 dict，最后 json.dumps 一遍；
+# 这里的 bytes 是 pydantic-core 一次性生成的（或者是缓存里的原始内容），这些步骤都可以省掉。
+# 🟡 直接返回 Response 时装饰器上的 status_code 不再生效，需要自己传；response_model 仍然保留，用来生成接口文档
+def json_response(body: bytes, status_code: int = status.HTTP_200_OK) -> Response:
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+# GET 接口带上 ETag：ETag 是响应体的指纹，内容不变指纹就不变
+# 浏览器 / 客户端下次请求时把它放在 If-None-Match 里带回来，和当前内容的指纹一致就直接回 304，
+# 不再传输响应体。
+# 指纹直接对响应体 bytes 现算：blake2b 算几百字节只要不到 1 微秒，
+# 比把指纹另外存进 Redis、每次多读一个字段更省事，缓存有没有命中都能用
+def etag_json_response(request: Request, body: bytes) -> Response:
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response = json_response(body)
+    response.headers["ETag"] = etag
+    return response
+
+
+# If-None-Match 可能是 "*"，也可能是逗号分隔的多个 ETag，弱校验的 W/ 前缀比较时忽略
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+BodyModel = TypeVar("BodyModel", bound=BaseModel)
+
+
+# 请求体的“反方向”：直接把原始 bytes 交给 pydantic-core 的 model_validate_json，
+# 解析 JSON 和校验字段在一次调用里完成。
+# 默认情况下 FastAPI 会先 json.loads 成 dict，再拿 dict 去校验，中间多造了一整棵 Python 对象。
+# 校验失败时转成 RequestValidationError，loc 前面补上 "body"，返回的 422 和 FastAPI 自己校验时一样
+# 🔴 Content-Type 必须先检查：只有 application/json、application/*+json（或者干脆没带这个头）才当 JSON 解析，
+# 和 FastAPI 自己的处理一致。text/plain 的表单提交 / fetch 属于“简单请求”，浏览器不会先发 CORS 预检，
+# 不拦住的话别的网站就能借用户的浏览器跨站创建 / 修改菜品（CSRF，见 CVE-2021-32677）
+def json_body(model: Type[BodyModel]) -> Callable[[Request], Awaitable[BodyModel]]:
+    async def parse(request: Request) -> BodyModel:
+        content_type = request.headers.get("content-type")
+        if content_type and not _is_json_content_type(content_type):
+            raise RequestValidationError([{
+                "type": "model_attributes_type",
+                "loc": ("body",),
+                "msg": "Input should be a valid dictionary or object to extract fields from",
+                "input": content_type,
+            }])
+        try:
+            return model.model_validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+            ) from e
+
+    return parse
+
+
+# 和 FastAPI 判断 JSON 请求体的方式一样：用 email.message.Message 解析 Content-Type（会自动去掉 charset 等参数）
+def _is_json_content_type(content_type: str) -> bool:
+    message = Message()
+    message["content-type"] = content_type
+    if message.get_content_maintype() != "application":
+        return False
+    subtype = message.get_content_subtype()
+    return subtype == "json" or subtype.endswith("+json")
+
+
+# 🟡 请求体不再是函数参数，FastAPI 就不知道接口要收什么了，
+# 所以用 openapi_extra 把模型的 JSON Schema 补回接口文档里
+def json_body_openapi(model: Type[BaseModel]) -> Dict[str, Any]:
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}},
+        }
+    }
+
+
+DishCreateBody = Annotated[DishCreate, Depends(json_body(DishCreate))]
+DishUpdateBody = Annotated[DishUpdate, Depends(json_body(DishUpdate))]
+
+
+# 列表 / 流式接口的查询参数
+# 游标只是上一页最后一条的 id，只有按 id 排序时才能靠它接着往下翻，
+# 其他排序方式带 cursor 直接返回 422，格式和 FastAPI 自己的参数校验错误一致
+# 🟡 不能写成 DishQueryParams 上的 model_validator：Depends() 里构造模型时抛出的校验错误不会变成 422，而是 500
+async def get_dish_query_params(params: DishQueryParams = Depends()) -> DishQueryParams:
+    if params.cursor is not None and params.order_by != "id":
+        raise RequestValidationError([{
+            "type": "value_error",
+            "loc": ("query", "cursor"),
+            "msg": "cursor pagination is only supported with order_by=id",
+            "input": params.cursor,
+        }])
+    return params
+
+
 # =====================================================================
 # 🟢 API 接口定义
 # =====================================================================
@@ -50,10 +167,11 @@ DishServiceDep = Annotated[DishService, Depends(get_dish_service)]
     "/",  # URL: POST /api/v1/dishes/
     response_model=DishPublic,      # 🟢 滤镜：告诉 FastAPI 用 DishPublic 过滤返回数据
     status_code=status.HTTP_201_CREATED, # 成功时返回 201 而不是 200
-    summary="创建新菜品" #summary什么作用：用于在 Swagger UI 中显示接口的摘要信息
+    summary="创建新菜品", #summary什么作用：用于在 Swagger UI 中显示接口的摘要信息
+    openapi_extra=json_body_openapi(DishCreate),
 )
 async def create_dish(
-    dish_in: DishCreate,            # 🟢 保安：自动校验用户传来的 JSON 是否符合 DishCreate
+    dish_in: DishCreateBody,        # 🟢 保安：自动校验用户传来的 JSON 是否符合 DishCreate
     service: DishServiceDep         # 🟢 注入：拿到组装好的 Service
 ):
     """
@@ -62,7 +180,8 @@ async def create_dish(
     - **description**: 描述（可选）
     """
     # 直接调用 Service，逻辑非常干净
-    return await service.create_dish(dish_in)
+    new_dish = await service.create_dish(dish_in)
+    return json_response(dish_dto_adapter.dump_json(new_dish), status_code=status.HTTP_201_CREATED)
 #DishServiceDep 只是个类型注释为什么可以直接被 FastAPI 识别并注入？
 #因为 FastAPI 有一个叫做 "依赖注入" 的机制，它可以自动识别并注入 Annotated 类型的参数。
 #在这个例子中，DishServiceDep 是一个 Annotated 类型，它的第一个参数是 DishService，第二个参数是 Depends(get_dish_service)。
@@ -81,15 +200,44 @@ async def create_dish(
 #    "name": "鱼香肉丝",
 #    "description": "鱼香肉丝是一道传统的中国名菜"
 #}
+# 🟡 注意：这个路由必须写在 /{dish_id} 前面，
+# 否则 "stream" 会先被当成 dish_id 去匹配，然后因为不是整数直接报 422
+@router.get("/stream", summary="流式导出菜品列表 (NDJSON)")
+async def stream_dishes(
+    service: DishServiceDep,
+    params: DishQueryParams = Depends(get_dish_query_params),
+) -> StreamingResponse:
+    """
+    和查询菜品列表的参数一样，但结果以 NDJSON（每行一个 JSON 对象）的形式边查边返回。
+    服务端不会把整页结果先攒成一个 list，适合 limit 很大的场景。
+    """
+    async def ndjson_lines() -> AsyncIterator[bytes]:
+        async for dish in service.stream_dishes(
+            search=params.search,
+            order_by=params.order_by,
+            direction=params.direction,
+            limit=params.limit,
+            offset=params.offset,
+            cursor=params.cursor,
+        ):
+            # dump_json 直接输出 bytes，在后面拼上换行就是一行 NDJSON
+            yield dish_dto_adapter.dump_json(dish) + b"\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
 @router.get("/{dish_id}", response_model=DishPublic, summary="获取单个菜品")
 async def get_dish(service: DishServiceDep,
+    request: Request,
     dish_id: int = Path(..., description="菜品ID"), # Path 表示这是 URL 路径里的参数
     ):
     # 🟢 注意：我删掉了这里的 try...except
     # 原因：我们已经写了全局异常处理 (src/core/exception.py)。
     # 如果 Service 抛出 NotFoundException，全局处理器会自动捕获并返回 404。
     # 这里不需要再手动 try 了，代码更简洁。
-    return await service.get_dish_by_id(dish_id)
+    # service 直接给出 JSON bytes（缓存命中时就是 Redis 里存的原始内容），这里原样返回
+    # 客户端带着相同的 ETag 再来时直接回 304
+    return etag_json_response(request, await service.get_dish_json(dish_id))
 
 #如何调用这个接口：
 #1. 发送 GET 请求到 /api/v1/dishes/123
@@ -106,27 +254,35 @@ async def get_dish(service: DishServiceDep,
 @router.get("/", response_model=List[DishPublic], summary="查询菜品列表")
 async def list_dishes(
     service: DishServiceDep,
+    request: Request,
     # 🟢 技巧：使用 Pydantic 模型接收查询参数
     # 这样你就不用写 search: str, limit: int... 一大堆参数了
     # Depends() 会自动把 URL 里的 ?limit=10&search=xxx 映射到 DishQueryParams 模型里
-    params: DishQueryParams = Depends() #depends中没有参数，所以会使用默认值，默认值是DishQueryParams()
+    params: DishQueryParams = Depends(get_dish_query_params) #get_dish_query_params 里再用 Depends() 把 URL 参数映射到 DishQueryParams
 ):
     """
     获取菜品列表，支持分页、搜索、排序。
     """
-    return await service.list_dishes(
+    body = await service.list_dishes_json(
         search=params.search,
         order_by=params.order_by,
         direction=params.direction,
         limit=params.limit,
         offset=params.offset,
-    ) #list_dishes返回一个包含多个 DishPublic 模型的列表
+        cursor=params.cursor,
+    ) #list_dishes_json返回一个 DishPublic 数组序列化后的 JSON
+    return etag_json_response(request, body)
 
 
-@router.patch("/{dish_id}", response_model=DishPublic, summary="更新菜品")
+@router.patch(
+    "/{dish_id}",
+    response_model=DishPublic,
+    summary="更新菜品",
+    openapi_extra=json_body_openapi(DishUpdate),
+)
 async def update_dish(
     dish_id: int,
-    dish_in: DishUpdate, # 接收更新的数据（所有字段都是可选的）
+    dish_in: DishUpdateBody, # 接收更新的数据（所有字段都是可选的）
     service: DishServiceDep, #为什么需要依赖注入：因为需要调用service.update_dish方法
 ):
     """
@@ -134,7 +290,8 @@ async def update_dish(
     - **name**: 菜品名称（可选）
     - **description**: 描述（可选）
     """
-    return await service.update_dish(dish_id, dish_in)
+    updated_dish = await service.update_dish(dish_id, dish_in)
+    return json_response(dish_dto_adapter.dump_json(updated_dish))
 
 #如何调用这个接口：
 #1. 发送 PATCH 请求到 /api/v1/dishes/123
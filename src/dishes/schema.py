@@ -64,6 +64,9 @@ class DishPublic(DishBase):
     # 对应 dishes 表里的关联数据，如果你希望返回该菜品所属的收藏夹，可以在这里加：
     # collections: List["CollectionPublic"] = []
 
+    # 🟡 DishPublic 只用来生成接口文档（response_model）。
+    # 真正的响应体由 Service 里的 DishDTO（src/dishes/dto.py）序列化而来，字段和这里保持一致
+
 
 # ==========================================
 # 5. 查询参数模型 (Filter Schema)
@@ -92,3 +95,10 @@ class DishQueryParams(SQLModel):
         ge=0,
         description="分页偏移"
     )
+    # 游标分页：把上一页最后一条菜品的 id 传回来，就从它后面接着取
+    # 传了 cursor 时 offset 不再生效；只支持 order_by=id，其他排序方式传 cursor 会返回 422
+    cursor: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="分页游标（上一页最后一条的 ID，仅支持 order_by=id）"
+    )
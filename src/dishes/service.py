@@ -1,16 +1,21 @@
+import asyncio
+from typing import AsyncIterator, Optional
+
     # 导入你在 schemas.py 里定义的模型      
-from src.dishes.schema import (
-    DishCreate,
-    DishPublic,  # 注意：之前我们定义的是 DishPublic，你这里叫 DishResponse，我都兼容
-    DishUpdate,
-)
+from src.dishes.schema import DishCreate, DishUpdate
 from sqlalchemy.exc import IntegrityError
 
+from src.core.config import settings
+
 # 假设你定义了这些自定义异常
 from src.core.exception import (
     AlreadyExistsException,
     NotFoundException,
 )
+from src.dishes.cache import DishCache
+from src.dishes.dto import DishDTO, dish_dto_adapter, dish_dto_list_adapter
+from src.dishes.loader import DishLoader
+from src.dishes.model import Dish
 from src.dishes.repository import DishRepository
 
 
@@ -23,38 +28,91 @@ class DishService:
     3. 转换异常（把 DB 错误转为业务错误）
     """
     # 这行代码的作用是初始化一个新的菜品服务。
-    # 它的参数是一个 DishRepository 实例，用于操作数据库。
-    def __init__(self, repository: DishRepository):
+    # 它的参数是一个 DishRepository 实例，用于操作数据库；
+    # 以及一个 DishCache 实例，用于读写 Redis 缓存；
+    # 还有一个 DishLoader 实例，用于把并发的按 ID 查询合并成一条 SQL。
+    def __init__(self, repository: DishRepository, cache: DishCache, loader: DishLoader):
         self.repository = repository
+        self.cache = cache
+        self.loader = loader
     # 这行代码的作用是创建一个新的菜品。
     # 它的参数是一个 DishCreate 模型，包含了菜品的名称、价格等信息。
-    # 它的返回值是一个 DishPublic 模型，包含了菜品的 ID、名称、价格等信息。
-    async def create_dish(self, dish_in: DishCreate) -> DishPublic:
+    # 它的返回值是一个 DishDTO，包含了菜品的 ID、名称、价格等信息。
+    async def create_dish(self, dish_in: DishCreate) -> DishDTO:
+        # 先问 Redis 里的“已用菜名”集合：不在集合里的名字大概率是新的，直接去插入；
+        # 在集合里的名字再用一条很轻的 SELECT 确认（集合里可能有已删除 / 已改名的旧名字）。
+        # 这样重复提交的名字不用走“INSERT 失败 -> 回滚”这条又慢又浪费的路
+        if await self.cache.has_name(dish_in.name) and await self.repository.exists_by_name(dish_in.name):
+            raise AlreadyExistsException(f"Dish with name '{dish_in.name}' already exists")
+
+        # 直接把 Schema 扔给 Repository
+        new_dish = await self.repository.create(dish_in)
+        # Repository 用的是 ON CONFLICT DO NOTHING，名字重复时不会抛 IntegrityError，而是返回 None
+        # 这里把它转成业务异常，API 层只需要捕获 AlreadyExistsException 就能返回 409
+        if new_dish is None:
+            # 集合里还没登记这个名字（比如 Redis 刚清空过），补登记上，下次就能在插入前拦住
+            await self.cache.add_name(dish_in.name)
+            raise AlreadyExistsException(f"Dish with name '{dish_in.name}' already exists")
+
+        # 多了一道菜，之前缓存的列表都不准了
+        await self.cache.add_name(new_dish.name)
+        await self.cache.invalidate()
+
+        # 把数据库实体 (Dish) 转成轻量的 DishDTO
+        # 数据来自数据库，不需要再校验一遍
+        return DishDTO.from_model(new_dish)
+
+    # 获取单个菜品，直接返回响应体（DishPublic 序列化后的 JSON bytes）
+    # 缓存里存的就是这段 bytes，命中时原样交给接口返回，整条路径上没有任何解析和序列化
+    async def get_dish_json(self, dish_id: int) -> bytes:
+        # 开关打开时，缓存和数据库同时查，谁先有结果用谁
+        if settings.dish_cache_race:
+            return await self._get_dish_racing(dish_id)
+
+        # 1. 先查缓存，命中就不用访问数据库了
+        cached = await self.cache.get_dish_json(dish_id)
+        if cached is not None:
+            return cached
+
+        # 2. 没命中再查数据库（通过 DataLoader，同一时刻的并发查询会合并成一条 SQL）
+        dish = await self.loader.load(dish_id)
+        return await self._cache_loaded_dish(dish_id, dish)
+
+    # 缓存和数据库“赛跑”：
+    # 串行的写法要等缓存返回“没命中”之后才开始查库，冷数据要多等一个 Redis 往返；
+    # 这里两个查询同时发出去，缓存命中就取消数据库查询，没命中时数据库查询其实已经在路上了。
+    # 代价是冷启动时会多查数据库，只有 Redis 延迟和数据库延迟差不多时才划算，所以默认关闭
+    async def _get_dish_racing(self, dish_id: int) -> bytes:
+        cache_task = asyncio.create_task(self.cache.get_dish_json(dish_id))
+        db_task = asyncio.create_task(self.loader.load(dish_id))
         try:
-            # 直接把 Schema 扔给 Repository
-            new_dish = await self.repository.create(dish_in)
-
-            # 把数据库实体 (Dish) 转回 响应模型 (DishPublic)
-            return DishPublic.model_validate(new_dish)
-        # 这行代码的作用是捕获数据库层面的“唯一性冲突”。
-        # 当尝试创建一个已存在的菜品时，数据库会抛出 IntegrityError。
-        # 我们捕获这个异常，转抛为 AlreadyExistsException，
-        # 这样 API 层只需要捕获这个异常就能返回 400 错误。
-        except IntegrityError as e:
-            # 🟡 捕获数据库层面的“唯一性冲突”，转抛为业务异常
-            # 这样 API 层只需要捕获 AlreadyExistsException 就能返回 400 错误
-            raise AlreadyExistsException(f"Dish with name '{dish_in.name}' already exists") from e
+            done, _ = await asyncio.wait({cache_task, db_task}, return_when=asyncio.FIRST_COMPLETED)
+            if cache_task in done:
+                cached = cache_task.result()
+                if cached is not None:
+                    return cached
+            # 缓存没命中（或者数据库先回来了），以数据库结果为准
+            dish = await db_task
+        finally:
+            # 没用上的那个查询直接取消（DataLoader 内部有 shield，不会影响别的请求）
+            for task in (cache_task, db_task):
+                if not task.done():
+                    task.cancel()
+        return await self._cache_loaded_dish(dish_id, dish)
 
-    async def get_dish_by_id(self, dish_id: int) -> DishPublic:
-        dish = await self.repository.get_by_id(dish_id)
+    # 3. 数据库查到之后序列化成响应体并写回缓存，下次同样的请求就直接走 Redis
+    async def _cache_loaded_dish(self, dish_id: int, dish: Optional[Dish]) -> bytes:
         if not dish:
             raise NotFoundException(f"Dish with id {dish_id} not found")
 
-        return DishPublic.model_validate(dish)
+        body = dish_dto_adapter.dump_json(DishDTO.from_model(dish))
+        await self.cache.set_dish_json(dish_id, body)
+        return body
+
     # 这行代码的作用是获取所有菜品。
     # 它的参数是一些查询参数，用于分页、搜索、排序等。
-    # 它的返回值是一个包含多个 DishPublic 模型的列表。
-    async def list_dishes(
+    # 它的返回值是整页菜品序列化后的 JSON bytes（一个 DishPublic 数组），接口直接原样返回。
+    async def list_dishes_json(
         self,
         *,
         search: str | None = None,
@@ -62,7 +120,21 @@ class DishService:
         direction: str = "asc",
         limit: int = 10,
         offset: int = 0,
-    ) -> list[DishPublic]:
+        cursor: int | None = None,
+    ) -> bytes:
+        # 查询参数一样，结果就一样，所以用参数拼出缓存 key
+        # 最常见的“第一页 + 默认排序”请求，在过期之前都只查一次数据库
+        cache_key = self.cache.list_key(
+            search=search,
+            order_by=order_by,
+            direction=direction,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+        )
+        cached = await self.cache.get_list_json(cache_key)
+        if cached is not None:
+            return cached
 
         dishes = await self.repository.get_all(
             search=search,
@@ -70,33 +142,67 @@ class DishService:
             direction=direction,
             limit=limit,
             offset=offset,
+            cursor=cursor,
         )
 
-        # 列表推导式：把一堆 DB Model 转成一堆 Public Schema
-        #model_validate() 方法的作用是把一个 DB Model 实例转换为一个 Public Schema 实例。
+        # 把一堆 DB Model 转成一堆 DishDTO，再整体序列化成 JSON
         # 这样做的好处是：
-        # 1. 隐藏了数据库的实现细节，前端只需要知道 DishPublic 模型的字段。
-        # 2. 可以对数据进行验证和转换，确保数据的完整性和一致性。
-        return [DishPublic.model_validate(dish) for dish in dishes]
+        # 1. 隐藏了数据库的实现细节，前端只拿到 DishPublic 文档里写明的那几个字段。
+        # 2. 整页数据一次 dump_json 交给 pydantic-core 处理，数据来自数据库，不再逐字段校验。
+        body = dish_dto_list_adapter.dump_json([DishDTO.from_model(dish) for dish in dishes])
+        await self.cache.set_list_json(cache_key, body)
+        return body
+
+    # 流式获取菜品列表：数据库读一行，就转换并交出去一行
+    # 不缓存、也不攒成 list，适合 limit 很大的导出类请求
+    async def stream_dishes(
+        self,
+        *,
+        search: str | None = None,
+        order_by: str = "id",
+        direction: str = "asc",
+        limit: int = 10,
+        offset: int = 0,
+        cursor: int | None = None,
+    ) -> AsyncIterator[DishDTO]:
+        async for dish in self.repository.iter_all(
+            search=search,
+            order_by=order_by,
+            direction=direction,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+        ):
+            yield DishDTO.from_model(dish)
 
     # 这行代码的作用是更新数据库中 ID 为 dish_id 的记录。
-    # 如果找到，就返回一个 DishPublic 对象；如果没有找到，就返回 None。
-    async def update_dish(self, dish_id: int, dish_in: DishUpdate) -> DishPublic:
+    # 如果找到，就返回一个 DishDTO 对象；如果没有找到，就抛出 NotFoundException。
+    async def update_dish(self, dish_id: int, dish_in: DishUpdate) -> DishDTO:
         # 这里的 dish_in 是 Update Schema (全都是 Optional 的)
-        # 我们不需要在 Service 层做 dump，直接传给 Repo
+        # 核心魔法：exclude_unset=True
+        # 如果 dish_in 里没有传 name，就不更新 name，只更新传了的字段
+        # 只在这里 dump 一次，Repo 拿到的就是“要改哪些列”的字典，不用再碰 Pydantic 模型
+        patch = dish_in.model_dump(exclude_unset=True)
         try:
-            updated_dish = await self.repository.update(dish_id, dish_in)
-
-            if not updated_dish:
-                raise NotFoundException(f"Dish with id {dish_id} not found")
-
-            return DishPublic.model_validate(updated_dish)
+            updated_dish = await self.repository.update(dish_id, patch)
 
         except IntegrityError as e:
             # 比如更新名字时，和别的菜名冲突了
             raise AlreadyExistsException("Dish with this name already exists") from e
 
+        if not updated_dish:
+            raise NotFoundException(f"Dish with id {dish_id} not found")
+
+        # 菜品变了，它自己的缓存和所有列表缓存都要作废
+        await self.cache.add_name(updated_dish.name)
+        await self.cache.invalidate(dish_id)
+
+        return DishDTO.from_model(updated_dish)
+
     async def delete_dish(self, dish_id: int) -> None:
         deleted = await self.repository.delete(dish_id)
         if not deleted:
             raise NotFoundException(f"Dish with id {dish_id} not found")
+
+        await self.cache.invalidate(dish_id)
+
@@ -10,42 +10,77 @@ from contextlib import asynccontextmanager
 from typing import TypedDict
 
 from fastapi import FastAPI
-from httpx import AsyncClient
+from httpx import AsyncClient, Limits
 from loguru import logger
 from redis.asyncio import Redis
+from sqlalchemy.orm import configure_mappers
 
-from src.core.database import create_db_and_tables
-from src.core.redis_db import create_auth_redis, create_cache_redis
+from src.core.config import settings
+from src.core.database import SessionFactory, check_db_connection, create_db_and_tables
+from src.core.logger import setup_logging
+from src.core.redis_db import close_redis_pools, create_auth_redis, create_cache_redis
+from src.dishes.loader import DishLoader
 
 
 # 定义应用状态类型
 # 用于在应用运行时传递 Redis 连接、HTTP 客户端等资源
 # 每个请求都可以通过依赖注入获取到这些资源
+# 这些资源只在启动时创建一次，request.state 里拿到的都是同一份对象的引用，不需要额外的中间件
 # 这是返回类型验证，用于确保在应用运行时传递的资源类型是正确的
 class State(TypedDict):
     auth_redis: Redis # 认证 Redis 连接
     cache_redis: Redis # 缓存 Redis 连接
     http_client: AsyncClient # HTTP 客户端，用于发送请求
+    dish_loader: DishLoader # 菜品批量加载器，合并并发的按 ID 查询
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[State]:
     # -------- 启动 --------
+    # 最先配置日志，后面启动过程中的日志就已经走后台队列了
+    setup_logging()
     logger.info("应用启动，开始加载所有资源...")
-    # 创建数据库表
-    await create_db_and_tables()
+    # 创建数据库表（仅开发环境！）
+    # 生产环境的表结构由部署流程里的迁移任务负责，启动时只检查一下数据库连不连得上
+    if settings.debug:
+        await create_db_and_tables()
+    else:
+        await check_db_connection()
+    # 预热：SQLAlchemy 的 mapper（表和类之间的映射、relationship 等）默认是第一次查询时才配置的，
+    # 放在启动时做完，第一个请求就不用替大家等这一下
+    # 🟢 Pydantic 的校验器 / 序列化器在类定义（导入）时就已经建好了，
+    # schema.py 里的 TypeAdapter 也是模块级的，导入 router 时同样建好，这里不用再碰
+    configure_mappers()
 
     auth_redis = create_auth_redis()
     cache_redis = create_cache_redis()
+    # 客户端创建时并不会真正去连 Redis，第一条命令才建连接
+    # 启动时先各 PING 一次，把 TCP 连接提前建好放进池子里，顺便确认 Redis 可用
+    await auth_redis.ping()
+    await cache_redis.ping()
     logger.info("Redis 已就绪。")
-    http_client = AsyncClient(timeout=10)
+    # 显式设置连接池上限：保持最多 100 条空闲的长连接，同时最多 200 条连接
+    # 调用上游时直接复用已经建好的 TCP/TLS 连接，不用每次都重新握手
+    http_client = AsyncClient(
+        timeout=10,
+        limits=Limits(max_keepalive_connections=100, max_connections=200),
+    )
+    dish_loader = DishLoader(SessionFactory)
 
     # -------- 运行 --------
-    yield State(auth_redis=auth_redis, cache_redis=cache_redis, http_client=http_client)
+    yield State(
+        auth_redis=auth_redis,
+        cache_redis=cache_redis,
+        http_client=http_client,
+        dish_loader=dish_loader,
+    )
 
     # -------- 关闭 --------
     await auth_redis.aclose()
     await cache_redis.aclose()
+    await close_redis_pools()
     await http_client.aclose()
 
     logger.info("应用关闭，资源已释放。")
+    # 日志是后台线程异步写的，退出前等队列里剩下的日志都写完
+    await logger.complete()
@@ -1,4 +1,5 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from pydantic_core import to_json
 
 from src.core.config import settings
 from src.core.exception import register_exception_handlers
@@ -41,7 +42,12 @@ app.include_router(dishes_router, prefix="/api/v1", tags=["Dishes"])
 # 3. 注册 Auth 路由 (如果有)
 # register_fastapi_users_routes(app, fastapi_users)
 
+# 健康检查的响应内容永远不变，启动时序列化一次，之后每次直接返回这段 bytes
+# 负载均衡会非常频繁地请求这个接口，省掉每次构造 dict + JSON 编码的开销
+_HEALTH_BODY = to_json({"status": "ok", "app_name": settings.app_name})
+
+
 @app.get("/health")
-async def health_check():
+async def health_check() -> Response:
     """健康检查接口"""
-    return {"status": "ok", "app_name": settings.app_name}
+    return Response(content=_HEALTH_BODY, media_type="application/json")
@@ -0,0 +1,35 @@
+# tests/conftest.py
+import os
+
+# 必须在导入 src 之前设置：模型的索引定义、Repository 选用的 INSERT 方言都在导入时按 DB_TYPE 决定
+# 测试统一跑在 SQLite 上，不依赖本地的 PostgreSQL / Redis
+os.environ["DB_TYPE"] = "sqlite"
+
+import pytest_asyncio  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+from sqlmodel.ext.asyncio.session import AsyncSession  # noqa: E402
+
+import src.dishes.model  # noqa: E402,F401  注册所有表到 metadata
+
+
+# 每个测试一个全新的 SQLite 文件库，测试之间互不影响
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.sqlite3'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+# 和 src/core/database.py 里的 SessionFactory 配置一致
+@pytest_asyncio.fixture
+def session_factory(engine):
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest_asyncio.fixture
+async def session(session_factory):
+    async with session_factory() as session:
+        yield session
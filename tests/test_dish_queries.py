@@ -0,0 +1,89 @@
+# tests/test_dish_queries.py
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+
+from src.dishes.dto import DishDTO, dish_dto_list_adapter
+from src.dishes.model import Collection, Dish
+from src.dishes.repository import DishRepository
+
+# 这个文件守住“查一页菜品只发一条 SQL”：
+# 以后给 Dish 加了关联（标签、分类……），如果列表接口在序列化时顺手去懒加载，就会变成 1 + N 条查询，
+# 这里的测试会直接失败
+
+
+# 记录 engine 上实际执行的每一条 SQL
+@pytest_asyncio.fixture
+async def captured_sql(engine):
+    statements: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+# 每道菜都挂在一个收藏夹里，有关联数据时才能暴露出 N+1
+@pytest_asyncio.fixture
+async def dishes_in_collections(session_factory):
+    async with session_factory() as session:
+        for i in range(5):
+            session.add(Collection(name=f"c{i}", dishes=[Dish(name=f"d{i}")]))
+        await session.commit()
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("dishes_in_collections")
+async def test_list_page_is_a_single_query(session, captured_sql):
+    captured_sql.clear()
+
+    dishes = await DishRepository(session).get_all(limit=10)
+    # 和 DishService.list_dishes_json 一样转换、序列化一整页
+    dish_dto_list_adapter.dump_json([DishDTO.from_model(dish) for dish in dishes])
+
+    assert len(dishes) == 5
+    assert len(captured_sql) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("dishes_in_collections")
+async def test_stream_is_a_single_query(session, captured_sql):
+    captured_sql.clear()
+
+    dishes = [DishDTO.from_model(dish) async for dish in DishRepository(session).iter_all(limit=10)]
+
+    assert len(dishes) == 5
+    assert len(captured_sql) == 1
+
+
+# Dish.collections 是 lazy="raise"：没在查询里显式加载就访问，直接报错而不是偷偷再发一条 SQL
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("dishes_in_collections")
+async def test_collections_lazy_load_raises(session, captured_sql):
+    [dish, *_] = await DishRepository(session).get_all(limit=1)
+    captured_sql.clear()
+
+    # 🟡 不设 lazy="raise" 时异步 Session 也会报错（MissingGreenlet，同样是 InvalidRequestError 的子类），
+    # 所以这里要核对报错信息确实来自 lazy="raise"
+    with pytest.raises(InvalidRequestError, match="lazy='raise'"):
+        dish.collections
+
+    assert captured_sql == []
+
+
+# 需要收藏夹时显式 selectinload：一页菜品 + 一条 IN 查询，总共固定 2 条
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("dishes_in_collections")
+async def test_collections_selectinload_is_one_extra_query(session, captured_sql):
+    captured_sql.clear()
+
+    result = await session.exec(select(Dish).options(selectinload(Dish.collections)))
+    dishes = result.all()
+
+    assert [len(dish.collections) for dish in dishes] == [1] * 5
+    assert len(captured_sql) == 2
@@ -0,0 +1,91 @@
+# tests/test_dish_repository.py
+import pytest
+
+from src.dishes.repository import DishRepository
+from src.dishes.schema import DishCreate
+
+
+async def seed(repository: DishRepository, *names: str) -> list[int]:
+    ids = []
+    for name in names:
+        dish = await repository.create(DishCreate(name=name))
+        ids.append(dish.id)
+    return ids
+
+
+# ---------------- 游标分页 ----------------
+@pytest.mark.asyncio
+async def test_cursor_continues_after_previous_page(session):
+    repository = DishRepository(session)
+    ids = await seed(repository, "a", "b", "c", "d", "e")
+
+    first_page = await repository.get_all(limit=2)
+    second_page = await repository.get_all(limit=2, cursor=first_page[-1].id)
+
+    assert [dish.id for dish in first_page] == ids[:2]
+    assert [dish.id for dish in second_page] == ids[2:4]
+
+
+@pytest.mark.asyncio
+async def test_cursor_desc(session):
+    repository = DishRepository(session)
+    ids = await seed(repository, "a", "b", "c", "d")
+
+    page = await repository.get_all(direction="desc", limit=2, cursor=ids[2])
+
+    assert [dish.id for dish in page] == [ids[1], ids[0]]
+
+
+# 游标那一行在两次翻页之间被删掉了，下一页照样能接着取
+@pytest.mark.asyncio
+async def test_cursor_survives_deleted_cursor_row(session):
+    repository = DishRepository(session)
+    ids = await seed(repository, "a", "b", "c", "d")
+
+    first_page = await repository.get_all(limit=2)
+    cursor = first_page[-1].id
+    assert await repository.delete(cursor)
+
+    second_page = await repository.get_all(limit=2, cursor=cursor)
+
+    assert [dish.id for dish in second_page] == ids[2:4]
+
+
+@pytest.mark.asyncio
+async def test_cursor_with_offset_ignores_offset(session):
+    repository = DishRepository(session)
+    ids = await seed(repository, "a", "b", "c")
+
+    page = await repository.get_all(limit=10, offset=100, cursor=ids[0])
+
+    assert [dish.id for dish in page] == ids[1:]
+
+
+@pytest.mark.asyncio
+async def test_cursor_requires_order_by_id(session):
+    repository = DishRepository(session)
+
+    with pytest.raises(ValueError):
+        await repository.get_all(order_by="name", cursor=1)
+
+
+# ---------------- 更新 ----------------
+# 同一个 Session 里先查出来再更新：内存里已有的那个对象也要变成新值，update() 返回的也是新值
+@pytest.mark.asyncio
+async def test_update_refreshes_object_already_in_session(session):
+    repository = DishRepository(session)
+    [dish_id] = await seed(repository, "a")
+
+    loaded = await repository.get_by_id(dish_id)
+    updated = await repository.update(dish_id, {"description": "upd"})
+
+    assert updated is not None
+    assert updated.description == "upd"
+    assert loaded.description == "upd"
+
+
+@pytest.mark.asyncio
+async def test_update_missing_dish_returns_none(session):
+    repository = DishRepository(session)
+
+    assert await repository.update(42, {"description": "upd"}) is None
@@ -0,0 +1,66 @@
+# tests/test_dish_router.py
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.dishes.dto import DishDTO
+from src.dishes.router import get_dish_service
+from src.dishes.schema import DishCreate
+from src.main import app
+
+
+# 这里只测参数校验，校验失败时根本走不到 Service，
+# 所以把 Service 换成 None，也不启动 lifespan（不需要数据库和 Redis）
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_dish_service] = lambda: None
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("path", ["/api/v1/", "/api/v1/stream"])
+@pytest.mark.parametrize("order_by", ["name", "created_at"])
+def test_cursor_rejected_unless_order_by_id(client, path, order_by):
+    response = client.get(path, params={"order_by": order_by, "cursor": 2})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["query", "cursor"]
+
+
+# 请求体只接受 JSON 的 Content-Type：text/plain 这类“简单请求”不会触发 CORS 预检，必须拒绝（防 CSRF）
+@pytest.mark.parametrize("content_type", ["text/plain", "application/x-www-form-urlencoded", "multipart/form-data"])
+def test_create_rejects_non_json_content_type(client, content_type):
+    response = client.post("/api/v1/", content=b'{"name": "b"}', headers={"content-type": content_type})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body"]
+
+
+def test_update_rejects_non_json_content_type(client):
+    response = client.patch("/api/v1/1", content=b'{"name": "b"}', headers={"content-type": "text/plain"})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body"]
+
+
+# 只替换 Service，用来确认合法的 JSON 请求体能顺利解析并交给 Service
+class StubDishService:
+    async def create_dish(self, dish_in: DishCreate) -> DishDTO:
+        return DishDTO(name=dish_in.name, description=dish_in.description, id=1, created_at=datetime(2024, 1, 1))
+
+
+@pytest.mark.parametrize(
+    "content_type",
+    [None, "application/json", "application/json; charset=utf-8", "application/merge-patch+json"],
+)
+def test_create_accepts_json_content_types(content_type):
+    app.dependency_overrides[get_dish_service] = StubDishService
+    headers = {"content-type": content_type} if content_type else {}
+    try:
+        response = TestClient(app).post("/api/v1/", content=b'{"name": "b"}', headers=headers)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 201
+    assert response.json()["name"] == "b"